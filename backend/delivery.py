@@ -0,0 +1,58 @@
+import re
+from bisect import bisect_right
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+CEP_LENGTH = 8
+
+
+class DeliveryZone(BaseModel):
+    """Faixa de CEPs atendida com a mesma taxa.
+
+    `cep_start` e `cep_end` aceitam prefixos: "01000" a "01599" cobre
+    de 01000-000 até 01599-999.
+    """
+    name: str
+    cep_start: str
+    cep_end: str
+    fee: float = Field(ge=0)
+
+
+def normalize_cep(raw: str) -> Optional[str]:
+    digits = re.sub(r"\D", "", raw or "")
+    return digits if len(digits) == CEP_LENGTH else None
+
+
+def _prefix(raw: str, fill: str) -> str:
+    digits = re.sub(r"\D", "", raw or "")
+    if not 1 <= len(digits) <= CEP_LENGTH:
+        raise ValueError(f"CEP inválido na zona de entrega: {raw!r}")
+    return digits.ljust(CEP_LENGTH, fill)
+
+
+class DeliveryFeeIndex:
+    """Zonas de entrega compiladas em faixas ordenadas para busca binária."""
+
+    def __init__(self, zones: List[DeliveryZone]):
+        ranges = sorted(
+            ((_prefix(z.cep_start, "0"), _prefix(z.cep_end, "9"), z) for z in zones),
+            key=lambda r: r[:2],
+        )
+        for start, end, zone in ranges:
+            if start > end:
+                raise ValueError(f"Zona '{zone.name}' com faixa de CEP invertida")
+        for (_, prev_end, prev), (start, _, zone) in zip(ranges, ranges[1:]):
+            if start <= prev_end:
+                raise ValueError(f"Zonas '{prev.name}' e '{zone.name}' se sobrepõem")
+        self._starts = [start for start, _, _ in ranges]
+        self._ranges = ranges
+
+    def __bool__(self):
+        return bool(self._ranges)
+
+    def lookup(self, cep: str) -> Optional[DeliveryZone]:
+        i = bisect_right(self._starts, cep) - 1
+        if i >= 0 and cep <= self._ranges[i][1]:
+            return self._ranges[i][2]
+        return None
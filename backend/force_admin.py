@@ -1,17 +1,23 @@
 import os
+from datetime import datetime, timezone
+from getpass import getpass
 from pymongo import MongoClient
 from passlib.context import CryptContext
 
 # --- DADOS DO ADMIN ---
-USUARIO = "admin"
-SENHA_TEXTO = "admin123"
+USUARIO = os.environ.get("ADMIN_USER", "admin")
 NOME_DO_BANCO = "renaildes_cakes" # <--- Aqui está a correção!
+LOJA = os.environ.get("STORE_ID", "renaildes")  # cada loja tem seu próprio admin
+# A senha nunca fica no código: vem de ADMIN_NEW_PASSWORD ou é digitada
+SENHA_TEXTO = os.environ.get("ADMIN_NEW_PASSWORD") or getpass(f"Senha do admin '{USUARIO}' da loja '{LOJA}': ")
 # ----------------------
 
 mongo_url = os.environ.get("MONGO_URL")
 
 if not mongo_url:
     print("❌ ERRO: Sem MONGO_URL.")
+elif len(SENHA_TEXTO) < 8:
+    print("❌ ERRO: A senha precisa ter pelo menos 8 caracteres.")
 else:
     try:
         # Conecta
@@ -26,17 +32,20 @@ else:
 
         # O COMANDO MÁGICO: upsert=True
         users.update_one(
-            {"username": USUARIO}, 
+            {"store_id": LOJA, "username": USUARIO}, 
             {"$set": {
+                "store_id": LOJA,
                 "username": USUARIO,
                 "hashed_password": senha_hash,
                 "role": "admin",
-                "email": "admin@force.com"
+                "email": "admin@force.com",
+                # Só usuários criados por aqui valem no login (ver check_admin_password)
+                "provisioned_at": datetime.now(timezone.utc).isoformat(),
             }},
             upsert=True
         )
         
-        print(f"✅ SUCESSO! Usuário '{USUARIO}' garantido no banco '{NOME_DO_BANCO}'.")
+        print(f"✅ SUCESSO! Usuário '{USUARIO}' garantido na loja '{LOJA}' do banco '{NOME_DO_BANCO}'.")
         
     except Exception as e:
         print(f"❌ Erro no banco: {e}")
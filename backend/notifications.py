@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import os
+import urllib.request
+import uuid
+from datetime import datetime, timezone, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+# --- REMETENTES ---
+class LogSender:
+    """Remetente padrão: apenas registra a notificação no log."""
+
+    async def send(self, notification: dict):
+        logger.info("Notificação %s: %s", notification["kind"], notification["message"])
+
+
+class WebhookSender:
+    """Envia a notificação como JSON para um webhook (ex.: gateway de WhatsApp)."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, notification: dict):
+        body = json.dumps({
+            "to": notification.get("to", ""),
+            "message": notification["message"],
+            "order_id": notification.get("order_id"),
+        }).encode("utf-8")
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            if resp.status >= 300:
+                raise RuntimeError(f"Webhook respondeu {resp.status}")
+
+    async def send(self, notification: dict):
+        await asyncio.to_thread(self._post, notification)
+
+
+def sender_from_env():
+    url = os.environ.get('NOTIFY_WEBHOOK_URL')
+    return WebhookSender(url) if url else LogSender()
+
+
+# --- OUTBOX ---
+def build_order_notification(order: dict, to: str = "") -> dict:
+    """Notificação de novo pedido, gravada dentro do próprio pedido no campo `notification`."""
+    msg = f"🎂 *Novo pedido #{order['id'][:8]}*\n"
+    msg += f"👤 {order['customer_name']} - 📱 {order['customer_phone']}\n"
+    msg += f"📍 {order['customer_address']}\n"
+    for item in order.get("items", []):
+        msg += f"• {item.get('quantity', 1)}x {item.get('name', '')}\n"
+    msg += f"💵 *TOTAL:* R$ {order['total']:.2f} ({order['payment_method']})"
+    now = _now().isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "kind": "new_order",
+        "order_id": order["id"],
+        "to": to,
+        "message": msg,
+        "status": "pending",
+        "attempts": 0,
+        "last_error": None,
+        "next_attempt_at": now,
+        "created_at": now,
+    }
+
+
+class OutboxWorker:
+    """Envia em lotes, em segundo plano, as notificações pendentes guardadas em `field`.
+
+    A notificação fica dentro do documento que a originou (o pedido), então
+    ela é gravada na mesma escrita atômica do pedido. Cada notificação é
+    reservada por `lease_seconds` antes do envio, então se o processo cair no
+    meio do lote ela volta a ficar disponível sozinha. Falhas são reagendadas
+    com backoff exponencial até `max_attempts`. Os documentos são localizados
+    por `store_id` e `id`, que formam o índice único da coleção.
+    """
+
+    def __init__(self, collection, sender, field: str = "notification", batch_size: int = 20,
+                 max_attempts: int = 6, base_delay: float = 5.0, max_delay: float = 3600.0,
+                 poll_interval: float = 5.0, lease_seconds: float = 60.0):
+        self.collection = collection
+        self.sender = sender
+        self.field = field
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def wake(self):
+        self._wakeup.set()
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+
+    def _set(self, values: dict) -> dict:
+        return {"$set": {f"{self.field}.{k}": v for k, v in values.items()}}
+
+    def due_query(self) -> dict:
+        return {f"{self.field}.status": "pending", f"{self.field}.next_attempt_at": {"$lte": _now().isoformat()}}
+
+    def doc_query(self, doc: dict) -> dict:
+        return {"store_id": doc["store_id"], "id": doc["id"]}
+
+    def claim_query(self, doc: dict) -> dict:
+        """Só reserva se ninguém mexeu na notificação desde a leitura do lote."""
+        note = doc[self.field]
+        return {
+            **self.doc_query(doc),
+            f"{self.field}.status": "pending",
+            f"{self.field}.next_attempt_at": note["next_attempt_at"],
+        }
+
+    async def _claim(self, doc: dict) -> bool:
+        lease = (_now() + timedelta(seconds=self.lease_seconds)).isoformat()
+        result = await self.collection.update_one(self.claim_query(doc), self._set({"next_attempt_at": lease}))
+        return result.modified_count == 1
+
+    async def _deliver(self, doc: dict):
+        note = doc[self.field]
+        try:
+            await self.sender.send(note)
+        except Exception as e:
+            attempts = note["attempts"] + 1
+            update = {"attempts": attempts, "last_error": str(e)}
+            if attempts >= self.max_attempts:
+                update["status"] = "failed"
+                logger.error("Notificação %s descartada após %d tentativas: %s", note["id"], attempts, e)
+            else:
+                update["next_attempt_at"] = (_now() + timedelta(seconds=self.backoff(attempts))).isoformat()
+            await self.collection.update_one(self.doc_query(doc), self._set(update))
+            return
+        await self.collection.update_one(
+            self.doc_query(doc),
+            self._set({"status": "sent", "attempts": note["attempts"] + 1, "sent_at": _now().isoformat()}),
+        )
+
+    async def drain_once(self) -> int:
+        """Processa um lote de notificações vencidas; retorna quantas foram reservadas."""
+        due = await self.collection.find(
+            self.due_query(), {"_id": 0, "store_id": 1, "id": 1, self.field: 1}
+        ).sort(f"{self.field}.next_attempt_at", 1).limit(self.batch_size).to_list(self.batch_size)
+        claimed = [doc for doc in due if await self._claim(doc)]
+        await asyncio.gather(*(self._deliver(doc) for doc in claimed))
+        return len(claimed)
+
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                if await self.drain_once():
+                    continue
+            except Exception:
+                logger.exception("Erro ao processar outbox de notificações")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,100 @@
+"""Publica o catálogo de cada loja como um JSON estático versionado.
+
+O bundle (produtos + configurações públicas) é gravado como
+`{loja}/catalog.{hash}.json`, com nome imutável para cache longo em CDN, e
+`{loja}/manifest.json` aponta para a versão atual. Só as últimas
+CATALOG_KEEP_VERSIONS versões ficam no disco. Uso manual:
+
+    python publish.py [loja ...]
+"""
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+BUNDLE_DIR = Path(os.environ.get('CATALOG_BUNDLE_DIR', ROOT_DIR / 'public' / 'catalog'))
+# Campos de configuração que não vão para o bundle público
+PRIVATE_SETTINGS_FIELDS = {"_id", "id", "store_id", "notify_to"}
+PRIVATE_PRODUCT_FIELDS = {"_id", "store_id"}
+# Versões antigas mantidas para quem ainda tem o manifesto anterior em cache
+KEEP_VERSIONS = int(os.environ.get('CATALOG_KEEP_VERSIONS', 5))
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def prune_bundles(store_dir: Path, keep: int = KEEP_VERSIONS):
+    """Apaga os bundles mais antigos da loja, mantendo os `keep` mais recentes."""
+    bundles = sorted(store_dir.glob("catalog.*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in bundles[max(keep, 1):]:
+        old.unlink(missing_ok=True)
+
+
+def bundle_exists(pointer: dict, bundle_dir: Path = BUNDLE_DIR) -> bool:
+    return (bundle_dir / pointer["path"]).exists() and (bundle_dir / pointer["store_id"] / "manifest.json").exists()
+
+
+def render_bundle(store_id: str, products: list, settings: dict) -> tuple:
+    """Monta o bundle e devolve (versão, bytes); a versão é o hash do conteúdo."""
+    content = {
+        "store_id": store_id,
+        "products": [{k: v for k, v in p.items() if k not in PRIVATE_PRODUCT_FIELDS} for p in products],
+        "settings": {k: v for k, v in settings.items() if k not in PRIVATE_SETTINGS_FIELDS},
+    }
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    version = hashlib.sha256(canonical).hexdigest()[:16]
+    return version, json.dumps({**content, "version": version}, ensure_ascii=False).encode("utf-8")
+
+
+async def publish_catalog(db, store_id: str, bundle_dir: Path = BUNDLE_DIR) -> dict:
+    """Gera o bundle da loja, atualiza o manifesto e registra a versão no banco."""
+    products = await db.products.find({"store_id": store_id}, {"_id": 0}).sort("created_at", 1).to_list(1000)
+    settings = await db.settings.find_one({"store_id": store_id, "id": "app_settings"}, {"_id": 0}) or {}
+    version, data = render_bundle(store_id, products, settings)
+
+    store_dir = bundle_dir / store_id
+    store_dir.mkdir(parents=True, exist_ok=True)
+    file_name = f"catalog.{version}.json"
+    if (store_dir / file_name).exists():
+        # Conteúdo igual a uma versão anterior: ela volta a ser a mais recente
+        os.utime(store_dir / file_name)
+    else:
+        _write_atomic(store_dir / file_name, data)
+
+    pointer = {
+        "store_id": store_id,
+        "version": version,
+        "file": file_name,
+        "path": f"{store_id}/{file_name}",
+        "published_at": datetime.now(timezone.utc).isoformat(),
+    }
+    _write_atomic(store_dir / "manifest.json", json.dumps(pointer).encode("utf-8"))
+    prune_bundles(store_dir)
+    await db.catalog_bundles.update_one({"store_id": store_id}, {"$set": pointer}, upsert=True)
+    return pointer
+
+
+async def main(store_ids):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from dotenv import load_dotenv
+
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL') or "mongodb://localhost:27017")
+    db = client[os.environ.get('DB_NAME', 'renaildes_cakes')]
+    if not store_ids:
+        store_ids = await db.settings.distinct("store_id")
+    for store_id in store_ids:
+        pointer = await publish_catalog(db, store_id)
+        print(f"✅ {store_id}: {pointer['path']}")
+    client.close()
+
+
+if __name__ == "__main__":
+    import sys
+    asyncio.run(main(sys.argv[1:]))
@@ -1,4 +1,6 @@
 import os
+from datetime import datetime, timezone
+from getpass import getpass
 from pymongo import MongoClient
 from passlib.context import CryptContext
 from dotenv import load_dotenv
@@ -11,8 +13,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # ---------------------------------------------------------
 # CONFIGURAÇÃO
-NOVA_SENHA = "Cakes123"  # <--- Coloque a nova senha aqui
-USUARIO_ADMIN = "admin"         # O usuário que você quer alterar
+USUARIO_ADMIN = os.getenv("ADMIN_USER", "admin")  # O usuário que você quer alterar
+LOJA = os.getenv("STORE_ID", "renaildes")          # A loja desse usuário
 # ---------------------------------------------------------
 
 def resetar_senha():
@@ -23,6 +25,12 @@ def resetar_senha():
         print("❌ Erro: Não encontrei a variável MONGO_URL no arquivo .env")
         return
 
+    # A nova senha vem de ADMIN_NEW_PASSWORD ou é digitada, nunca do código
+    nova_senha = os.getenv("ADMIN_NEW_PASSWORD") or getpass(f"Nova senha de '{USUARIO_ADMIN}' na loja '{LOJA}': ")
+    if len(nova_senha) < 8:
+        print("❌ Erro: A senha precisa ter pelo menos 8 caracteres.")
+        return
+
     try:
         # Conecta ao banco
         client = MongoClient(mongo_url)
@@ -30,18 +38,21 @@ def resetar_senha():
         collection = db["users"]
 
         # Gera o Hash (senha criptografada)
-        senha_hash = pwd_context.hash(NOVA_SENHA)
+        senha_hash = pwd_context.hash(nova_senha)
 
-        # Atualiza no banco
+        # Atualiza no banco, só na loja escolhida
         resultado = collection.update_one(
-            {"username": USUARIO_ADMIN},
-            {"$set": {"hashed_password": senha_hash}} # Nota: O campo pode ser 'hashed_password' ou 'password', depende de como o Emergent gerou.
+            {"store_id": LOJA, "username": USUARIO_ADMIN},
+            {"$set": {
+                "hashed_password": senha_hash,
+                "provisioned_at": datetime.now(timezone.utc).isoformat(),
+            }}
         )
 
         if resultado.matched_count > 0:
-            print(f"✅ Sucesso! A senha do usuário '{USUARIO_ADMIN}' foi atualizada.")
+            print(f"✅ Sucesso! A senha do usuário '{USUARIO_ADMIN}' da loja '{LOJA}' foi atualizada.")
         else:
-            print(f"⚠️ Usuário '{USUARIO_ADMIN}' não encontrado. Verifique se o nome está correto.")
+            print(f"⚠️ Usuário '{USUARIO_ADMIN}' não encontrado na loja '{LOJA}'. Crie-o com force_admin.py.")
 
     except Exception as e:
         print(f"❌ Erro ao conectar: {e}")
@@ -1,17 +1,26 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, BackgroundTasks, HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.staticfiles import StaticFiles
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import OperationFailure
+import asyncio
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Union
+import re
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 from passlib.context import CryptContext
+from delivery import DeliveryFeeIndex, DeliveryZone, normalize_cep
+from notifications import OutboxWorker, build_order_notification, sender_from_env
+from publish import BUNDLE_DIR, bundle_exists, publish_catalog
+from tenants import STORE_ID_RE, TenantCache, host_store, parse_store_hosts
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,9 +36,42 @@ app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 security = HTTPBearer()
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.environ.get('JWT_SECRET', 'secret-key')
 ALGORITHM = "HS256"
 
+# Lojas: cada documento carrega `store_id`; a loja vem do prefixo
+# /stores/{store_id}/api, do Host (STORE_HOSTS) ou cai na loja padrão
+DEFAULT_STORE_ID = os.environ.get('DEFAULT_STORE_ID', 'renaildes')
+STORE_HOSTS = parse_store_hosts(os.environ.get('STORE_HOSTS', ''))
+KNOWN_STORES = {DEFAULT_STORE_ID, *STORE_HOSTS.values(), *(
+    s.strip() for s in os.environ.get('STORES', '').split(',') if STORE_ID_RE.match(s.strip())
+)}
+store_cache = TenantCache(
+    max_stores=int(os.environ.get('STORE_CACHE_SIZE', 32)),
+    ttl=float(os.environ.get('STORE_CACHE_TTL', 60)),
+)
+
+# Bundles estáticos do catálogo; CATALOG_BUNDLE_URL aponta para a CDN quando houver
+CATALOG_BUNDLE_URL = os.environ.get('CATALOG_BUNDLE_URL', '/catalog').rstrip('/')
+logger = logging.getLogger(__name__)
+
+# Arquivamento: pedidos finalizados mais antigos que N dias saem da coleção quente
+ARCHIVE_STATUSES = ["Feito", "Entregue", "Cancelado"]
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+# Intervalo do arquivamento automático de todas as lojas; 0 desliga
+ARCHIVE_INTERVAL_HOURS = float(os.environ.get('ARCHIVE_INTERVAL_HOURS', 24))
+
+# Pedidos cancelados não contam no resumo do cliente
+CANCELLED_STATUS = "Cancelado"
+
+# Telefones sem código do país são tratados como brasileiros
+DEFAULT_COUNTRY_CODE = os.environ.get('DEFAULT_COUNTRY_CODE', '55')
+
+# Notificações de novos pedidos viajam dentro do pedido e são enviadas em segundo plano
+outbox_worker = OutboxWorker(db.orders, sender_from_env())
+
 # --- MODELOS ---
 class Product(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -39,6 +81,7 @@ class Product(BaseModel):
     price: float
     category: str
     image_url: str = ""
+    store_id: str = DEFAULT_STORE_ID
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class ProductCreate(BaseModel):
@@ -62,6 +105,10 @@ class Settings(BaseModel):
     # Agora usamos listas de objetos em vez de strings
     massas_options: List[CustomOption] = []
     recheios_options: List[CustomOption] = []
+    # Taxas por faixa de CEP; sem zonas vale a taxa fixa `delivery_fee`
+    delivery_zones: List[DeliveryZone] = []
+    # WhatsApp que recebe o aviso de novos pedidos desta loja
+    notify_to: str = ""
 
 class Order(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -73,13 +120,16 @@ class Order(BaseModel):
     total: float
     payment_method: str
     status: str = "Pendente"
+    store_id: str = DEFAULT_STORE_ID
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     delivery_fee: float = 0.0
+    customer_cep: Optional[str] = None
 
 class OrderCreate(BaseModel):
     customer_name: str
     customer_phone: str
     customer_address: str
+    customer_cep: Optional[str] = None
     items: List[dict]
     subtotal: float
     delivery_fee: float
@@ -91,6 +141,36 @@ class AdminLogin(BaseModel):
     username: str
     password: str
 
+# --- CONSULTAS ---
+# Filtros e ordenações usados pelas rotas; tests/test_query_plans.py monta as
+# mesmas consultas a partir daqui e confere no explain() que todas usam índice
+OLDEST_FIRST = [("created_at", 1)]
+NEWEST_FIRST = [("created_at", -1)]
+RECENT_CUSTOMERS_FIRST = [("last_order_at", -1)]
+
+def by_store(store_id: str) -> dict:
+    return {"store_id": store_id}
+
+def doc_key(store_id: str, doc_id) -> dict:
+    """Produto, pedido ou configurações da loja; `doc_id` pode ser um filtro ($in)."""
+    return {"store_id": store_id, "id": doc_id}
+
+def customer_key(store_id: str, phone) -> dict:
+    return {"store_id": store_id, "phone": phone}
+
+def customer_orders_query(store_id: str, phone) -> dict:
+    return {"store_id": store_id, "customer_phone": phone}
+
+def summary_orders_query(store_id: str, phone) -> dict:
+    """Pedidos que entram no resumo do cliente; `phone` pode ser um filtro."""
+    return {**customer_orders_query(store_id, phone), "status": {"$ne": CANCELLED_STATUS}}
+
+def archivable_query(store_id: str, cutoff: str) -> dict:
+    return {"store_id": store_id, "status": {"$in": ARCHIVE_STATUSES}, "created_at": {"$lt": cutoff}}
+
+def admin_user_query(store_id: str, username: str) -> dict:
+    return {"store_id": store_id, "username": username, "provisioned_at": {"$exists": True}}
+
 # --- AUTH ---
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -98,93 +178,546 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# --- LOJAS ---
+def current_store(request: Request) -> str:
+    store_id = request.path_params.get("store_id")
+    if store_id is None:
+        return host_store(request.headers.get("host", ""), STORE_HOSTS) or DEFAULT_STORE_ID
+    if store_id not in KNOWN_STORES:
+        raise HTTPException(status_code=404, detail="Loja não encontrada")
+    return store_id
+
+def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security), store_id: str = Depends(current_store)):
     try:
         token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except:
         raise HTTPException(status_code=401, detail="Token inválido")
+    # Tokens emitidos antes das lojas não têm `store` e valem para a loja padrão
+    if payload.get("store", DEFAULT_STORE_ID) != store_id:
+        raise HTTPException(status_code=403, detail="Token de outra loja")
+    return payload
+
+async def load_settings(store_id: str) -> dict:
+    """Configurações da loja, servidas do cache junto com o índice de entrega compilado."""
+    settings = store_cache.get(store_id, "settings")
+    if settings is None:
+        settings = await db.settings.find_one(doc_key(store_id, "app_settings"), {"_id": 0})
+        if not settings:
+            settings = {**Settings().model_dump(), "store_id": store_id}
+            await db.settings.update_one(
+                doc_key(store_id, "app_settings"), {"$setOnInsert": settings}, upsert=True
+            )
+        cache_settings(store_id, settings)
+    return settings
+
+def cache_settings(store_id: str, settings: dict):
+    try:
+        parsed = Settings(**settings)
+        delivery = (DeliveryFeeIndex(parsed.delivery_zones), parsed.delivery_fee)
+    except ValueError:
+        # Zonas gravadas antes da validação não podem derrubar a loja: vale a taxa fixa
+        logger.exception("Zonas de entrega inválidas na loja %s; usando a taxa fixa", store_id)
+        delivery = (DeliveryFeeIndex([]), float(settings.get("delivery_fee", Settings().delivery_fee)))
+    store_cache.set(store_id, "delivery", delivery)
+    store_cache.set(store_id, "settings", settings)
+
+async def notification_recipient(store_id: str) -> Optional[str]:
+    """Destino dos avisos de novos pedidos da loja; None quando a loja não configurou um.
+
+    NOTIFY_TO só vale para a loja padrão, para que pedidos de uma loja nunca
+    cheguem ao WhatsApp de outra.
+    """
+    settings = await load_settings(store_id)
+    if settings.get("notify_to"):
+        return settings["notify_to"]
+    if store_id == DEFAULT_STORE_ID:
+        return os.environ.get('NOTIFY_TO') or None
+    return None
+
+# --- CATÁLOGO ESTÁTICO ---
+async def publish_store_catalog(store_id: str) -> dict:
+    await load_settings(store_id)  # garante o documento de configurações da loja
+    pointer = await publish_catalog(db, store_id, BUNDLE_DIR)
+    store_cache.set(store_id, "bundle", pointer)
+    return pointer
+
+async def republish_catalog(store_id: str):
+    """Tarefa em segundo plano após alterações de produtos ou configurações."""
+    try:
+        await publish_store_catalog(store_id)
+    except Exception:
+        logger.exception("Falha ao publicar o catálogo da loja %s", store_id)
+
+async def republish_all_catalogs():
+    # O disco do deploy (ex.: Render) é apagado a cada deploy, então os bundles
+    # são regerados na subida; como o nome é o hash, o conteúdo não muda
+    for store_id in sorted(KNOWN_STORES | set(await db.settings.distinct("store_id"))):
+        await republish_catalog(store_id)
+
+# --- ENTREGA ---
+# O índice de zonas é compilado quando as configurações mudam; consultas ficam em memória
+async def quote_delivery(store_id: str, cep: Optional[str]) -> dict:
+    compiled = store_cache.get(store_id, "delivery")
+    if compiled is None:
+        store_cache.invalidate(store_id, "settings")
+        await load_settings(store_id)
+        compiled = store_cache.get(store_id, "delivery")
+    delivery_index, flat_fee = compiled
+    if not delivery_index:
+        return {"cep": normalize_cep(cep), "zone": None, "fee": flat_fee}
+    normalized = normalize_cep(cep)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="CEP inválido")
+    zone = delivery_index.lookup(normalized)
+    if not zone:
+        raise HTTPException(status_code=400, detail="CEP fora da área de entrega")
+    return {"cep": normalized, "zone": zone.name, "fee": zone.fee}
+
+# --- CLIENTES ---
+def normalize_phone(raw: str) -> str:
+    """Converte um telefone digitado pelo cliente para E.164 (ex.: +5511999999999)."""
+    digits = re.sub(r"\D", "", raw or "")
+    if (raw or "").strip().startswith("+"):
+        if 8 <= len(digits) <= 15:
+            return "+" + digits
+    else:
+        # Sem "+" só aceitamos número nacional com DDD, com ou sem o código do país;
+        # sem DDD ("98177-7873") o número viraria um E.164 de outro país
+        digits = digits.lstrip("0")
+        if len(digits) in (10, 11):
+            return "+" + DEFAULT_COUNTRY_CODE + digits
+        if len(digits) - len(DEFAULT_COUNTRY_CODE) in (10, 11) and digits.startswith(DEFAULT_COUNTRY_CODE):
+            return "+" + digits
+    raise HTTPException(status_code=400, detail="Telefone inválido (inclua o DDD)")
+
+async def record_customer_order(order: dict):
+    """Atualiza o resumo do cliente (pedidos, último pedido, total gasto) em uma única operação.
+
+    Exclusões e cancelamentos recalculam o cliente com `refresh_customer`.
+    """
+    await db.customers.update_one(
+        customer_key(order["store_id"], order["customer_phone"]),
+        {
+            "$set": {
+                "name": order["customer_name"],
+                "last_address": order["customer_address"],
+                "last_order_id": order["id"],
+                "last_order_at": order["created_at"],
+                "last_order_items": order["items"],
+            },
+            "$inc": {"order_count": 1, "lifetime_value": order["total"]},
+            "$setOnInsert": {"first_order_at": order["created_at"]},
+        },
+        upsert=True,
+    )
+
+CUSTOMER_ORDER_FIELDS = {
+    "_id": 0, "id": 1, "store_id": 1, "customer_name": 1, "customer_phone": 1,
+    "customer_address": 1, "items": 1, "total": 1, "created_at": 1,
+}
+
+def _add_to_summary(customers: dict, order: dict):
+    key = (order["store_id"], order["customer_phone"])
+    c = customers.setdefault(key, {
+        "store_id": key[0], "phone": key[1], "order_count": 0, "lifetime_value": 0.0,
+        "first_order_at": order["created_at"], "last_order_at": "",
+    })
+    c["order_count"] += 1
+    c["lifetime_value"] += order.get("total", 0.0)
+    c["first_order_at"] = min(c["first_order_at"], order["created_at"])
+    if order["created_at"] > c["last_order_at"]:
+        c.update({
+            "name": order.get("customer_name", ""),
+            "last_address": order.get("customer_address", ""),
+            "last_order_id": order["id"],
+            "last_order_at": order["created_at"],
+            "last_order_items": order.get("items", []),
+        })
+
+async def _summarize_customers(query: dict) -> dict:
+    customers = {}
+    for collection in (db.orders, db.orders_archive):
+        async for order in collection.find(query, CUSTOMER_ORDER_FIELDS):
+            _add_to_summary(customers, order)
+    return customers
+
+async def refresh_customer(store_id: str, phone: str):
+    """Recalcula o resumo de um cliente a partir dos pedidos dele, no lugar do incremento."""
+    key = customer_key(store_id, phone)
+    summary = (await _summarize_customers(summary_orders_query(store_id, phone))).get((store_id, phone))
+    if summary:
+        await db.customers.replace_one(key, summary, upsert=True)
+    else:
+        await db.customers.delete_one(key)
+
+async def sync_customer(store_id: str, phone: Optional[str]):
+    if not phone:
+        return
+    try:
+        await refresh_customer(store_id, phone)
+    except Exception:
+        # Como no checkout: o resumo é derivado, e /admin/customers/rebuild corrige desvios
+        logger.exception("Falha ao recalcular o cliente %s da loja %s", phone, store_id)
+
+async def rebuild_customers(store_id: str) -> dict:
+    """Reconstrói do zero todos os resumos de clientes da loja a partir de `orders` e `orders_archive`."""
+    customers = await _summarize_customers(summary_orders_query(store_id, {"$regex": "^\\+"}))
+    replaces = [ReplaceOne(customer_key(c["store_id"], c["phone"]), c, upsert=True) for c in customers.values()]
+    for i in range(0, len(replaces), 500):
+        await db.customers.bulk_write(replaces[i:i + 500], ordered=False)
+    phones = [c["phone"] for c in customers.values()]
+    removed = await db.customers.delete_many(customer_key(store_id, {"$nin": phones}))
+    return {"customers": len(customers), "removed": removed.deleted_count}
+
+async def migrate_customers():
+    """Normaliza telefones de pedidos antigos e reconstrói os resumos de clientes.
+
+    Roda uma única vez (marcada em `migrations`); repetir é seguro porque os
+    resumos são recalculados do zero a partir de `orders` e `orders_archive`.
+    """
+    if await db.migrations.find_one({"id": "customers_v2"}):
+        return
+    stores = set(KNOWN_STORES)
+    for collection in (db.orders, db.orders_archive):
+        updates = []
+        async for doc in collection.find({"customer_phone": {"$not": {"$regex": "^\\+"}}}, {"_id": 1, "customer_phone": 1}):
+            raw = doc.get("customer_phone") or ""
+            try:
+                update = {"customer_phone": normalize_phone(raw), "customer_phone_raw": raw}
+            except HTTPException:
+                update = {"customer_phone_invalid": True}
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+            if len(updates) >= 500:
+                await collection.bulk_write(updates, ordered=False)
+                updates = []
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+        stores |= set(await collection.distinct("store_id"))
+
+    for store_id in sorted(stores):
+        await rebuild_customers(store_id)
+    await db.migrations.update_one(
+        {"id": "customers_v2"},
+        {"$set": {"id": "customers_v2", "done_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True,
+    )
+
+# --- ARQUIVAMENTO ---
+async def archive_orders(store_id: str, older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE):
+    """Move pedidos finalizados e antigos da loja de `orders` para `orders_archive` em lotes.
+
+    Cada lote é primeiro gravado no arquivo (upsert por id) e só depois removido
+    de `orders`, então uma execução interrompida pode ser repetida sem perder
+    nem duplicar pedidos.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    query = archivable_query(store_id, cutoff)
+    archived = 0
+    while True:
+        batch = await db.orders.find(query, {"_id": 0}).sort(OLDEST_FIRST).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        archived_at = datetime.now(timezone.utc).isoformat()
+        await db.orders_archive.bulk_write(
+            [ReplaceOne(doc_key(store_id, o["id"]), {**o, "archived_at": archived_at}, upsert=True) for o in batch],
+            ordered=False,
+        )
+        await db.orders.delete_many(doc_key(store_id, {"$in": [o["id"] for o in batch]}))
+        archived += len(batch)
+    return {"archived": archived, "cutoff": cutoff}
+
+async def find_order(store_id: str, order_id: str):
+    query = doc_key(store_id, order_id)
+    order = await db.orders.find_one(query, {"_id": 0})
+    if not order:
+        order = await db.orders_archive.find_one(query, {"_id": 0})
+    return order
+
+async def archive_all_stores():
+    stores = KNOWN_STORES | set(await db.settings.distinct("store_id"))
+    for store_id in sorted(stores):
+        try:
+            result = await archive_orders(store_id)
+            if result["archived"]:
+                logger.info("Loja %s: %d pedidos arquivados", store_id, result["archived"])
+        except Exception:
+            logger.exception("Falha ao arquivar pedidos da loja %s", store_id)
+
+async def archive_loop():
+    while True:
+        await archive_all_stores()
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
+
+archive_task: Optional[asyncio.Task] = None
+catalog_task: Optional[asyncio.Task] = None
+
+# Índices de antes das lojas, substituídos pelas versões que começam com store_id
+LEGACY_INDEXES = {
+    "settings": ["id_1"],
+    "products": ["id_1", "created_at_1"],
+    "orders": ["id_1", "created_at_-1", "status_1_created_at_1", "customer_phone_1_created_at_-1"],
+    "orders_archive": ["id_1", "customer_phone_1_created_at_-1"],
+    "customers": ["phone_1", "last_order_at_-1"],
+    "users": [],
+}
+
+@app.on_event("startup")
+async def create_indexes():
+    # Toda consulta das rotas precisa de um índice: tests/test_query_plans.py garante isso
+    for collection, names in LEGACY_INDEXES.items():
+        for name in names:
+            try:
+                await db[collection].drop_index(name)
+            except OperationFailure:
+                pass
+        # Documentos criados antes das lojas pertencem à loja padrão
+        await db[collection].update_many({"store_id": {"$exists": False}}, {"$set": {"store_id": DEFAULT_STORE_ID}})
+    await db.settings.create_index([("store_id", 1), ("id", 1)], unique=True)
+    await db.products.create_index([("store_id", 1), ("id", 1)], unique=True)
+    await db.products.create_index([("store_id", 1), ("created_at", 1)])
+    await db.orders.create_index([("store_id", 1), ("id", 1)], unique=True)
+    await db.orders.create_index([("store_id", 1), ("created_at", -1)])
+    await db.orders.create_index([("store_id", 1), ("status", 1), ("created_at", 1)])
+    await db.orders.create_index([("store_id", 1), ("customer_phone", 1), ("created_at", -1)])
+    await db.orders_archive.create_index([("store_id", 1), ("id", 1)], unique=True)
+    await db.orders_archive.create_index([("store_id", 1), ("customer_phone", 1), ("created_at", -1)])
+    await db.customers.create_index([("store_id", 1), ("phone", 1)], unique=True)
+    await db.customers.create_index([("store_id", 1), ("last_order_at", -1)])
+    await db.catalog_bundles.create_index("store_id", unique=True)
+    await db.users.create_index([("store_id", 1), ("username", 1)], unique=True)
+    await migrate_customers()
+    await db.orders.create_index([("notification.status", 1), ("notification.next_attempt_at", 1)])
+
+@app.on_event("startup")
+async def start_outbox_worker():
+    outbox_worker.start()
+
+@app.on_event("shutdown")
+async def stop_outbox_worker():
+    await outbox_worker.stop()
+
+@app.on_event("startup")
+async def start_catalog_publish():
+    global catalog_task
+    BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+    catalog_task = asyncio.create_task(republish_all_catalogs())
+
+@app.on_event("shutdown")
+async def stop_catalog_publish():
+    if catalog_task is not None:
+        catalog_task.cancel()
+
+@app.on_event("startup")
+async def start_archive_loop():
+    global archive_task
+    if ARCHIVE_INTERVAL_HOURS > 0:
+        archive_task = asyncio.create_task(archive_loop())
+
+@app.on_event("shutdown")
+async def stop_archive_loop():
+    if archive_task is not None:
+        archive_task.cancel()
 
 # --- ROTAS ---
 
-@api_router.post("/admin/login")
-async def admin_login(login: AdminLogin):
+async def check_admin_password(store_id: str, username: str, password: str) -> bool:
+    """Confere o login da loja.
+
+    Só contam usuários de `users` criados de propósito por force_admin.py ou
+    reset_password.py (marcados com `provisioned_at`); linhas antigas da coleção
+    são ignoradas. Fora isso valem ADMIN_USERNAME/ADMIN_PASSWORD, só na loja padrão.
+    """
+    user = await db.users.find_one(admin_user_query(store_id, username), {"_id": 0, "hashed_password": 1})
+    if user:
+        return await asyncio.to_thread(pwd_context.verify, password, user["hashed_password"])
+    if store_id != DEFAULT_STORE_ID:
+        return False
     admin_user = os.environ.get('ADMIN_USERNAME', 'admin')
     admin_pass = os.environ.get('ADMIN_PASSWORD', 'admin123')
-    
-    if login.username == admin_user and login.password == admin_pass:
-        token = create_access_token({"sub": login.username})
+    return username == admin_user and password == admin_pass
+
+@api_router.post("/admin/login")
+async def admin_login(login: AdminLogin, store_id: str = Depends(current_store)):
+    if await check_admin_password(store_id, login.username, login.password):
+        token = create_access_token({"sub": login.username, "store": store_id})
         return {"access_token": token, "token_type": "bearer"}
     raise HTTPException(status_code=401, detail="Senha incorreta")
 
+@api_router.post("/admin/orders/archive")
+async def run_archive(days: int = ARCHIVE_AFTER_DAYS, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    if days < 0:
+        raise HTTPException(status_code=400, detail="Número de dias inválido")
+    return await archive_orders(store_id, days)
+
+@api_router.post("/admin/customers/rebuild")
+async def run_customers_rebuild(store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    return await rebuild_customers(store_id)
+
 # CONFIGURAÇÕES
 @api_router.get("/settings")
-async def get_settings():
-    settings = await db.settings.find_one({"id": "app_settings"}, {"_id": 0})
-    if not settings:
-        default = Settings()
-        await db.settings.insert_one(default.model_dump())
-        return default
-    return settings
+async def get_settings(store_id: str = Depends(current_store)):
+    return await load_settings(store_id)
 
 @api_router.put("/settings")
-async def update_settings(settings: Settings, token: dict = Depends(verify_token)):
-    doc = settings.model_dump()
-    await db.settings.update_one({"id": "app_settings"}, {"$set": doc}, upsert=True)
+async def update_settings(settings: Settings, background_tasks: BackgroundTasks, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    doc = {**settings.model_dump(), "id": "app_settings", "store_id": store_id}
+    try:
+        DeliveryFeeIndex(settings.delivery_zones)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.settings.update_one(doc_key(store_id, "app_settings"), {"$set": doc}, upsert=True)
+    cache_settings(store_id, doc)
+    background_tasks.add_task(republish_catalog, store_id)
     return doc
 
+# CATÁLOGO ESTÁTICO
+@api_router.get("/catalog")
+async def get_catalog_bundle(store_id: str = Depends(current_store)):
+    pointer = store_cache.get(store_id, "bundle")
+    if pointer is None:
+        pointer = await db.catalog_bundles.find_one(by_store(store_id), {"_id": 0})
+        store_cache.set(store_id, "bundle", pointer)
+    # O ponteiro no banco pode sobreviver aos arquivos (disco efêmero ou outro processo)
+    if not pointer or not bundle_exists(pointer, BUNDLE_DIR):
+        pointer = await publish_store_catalog(store_id)
+    return {
+        **pointer,
+        "url": f"{CATALOG_BUNDLE_URL}/{pointer['path']}",
+        "manifest_url": f"{CATALOG_BUNDLE_URL}/{store_id}/manifest.json",
+    }
+
+# ENTREGA
+@api_router.get("/delivery/quote")
+async def get_delivery_quote(cep: str = "", store_id: str = Depends(current_store)):
+    return await quote_delivery(store_id, cep)
+
 # PRODUTOS
 @api_router.get("/products")
-async def get_products():
-    return await db.products.find({}, {"_id": 0}).to_list(1000)
+async def get_products(store_id: str = Depends(current_store)):
+    catalog = store_cache.get(store_id, "catalog")
+    if catalog is None:
+        catalog = await db.products.find(by_store(store_id), {"_id": 0}).sort(OLDEST_FIRST).to_list(1000)
+        store_cache.set(store_id, "catalog", catalog)
+    return catalog
 
 @api_router.get("/products/{product_id}")
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
+async def get_product(product_id: str, store_id: str = Depends(current_store)):
+    product = await db.products.find_one(doc_key(store_id, product_id), {"_id": 0})
     if not product:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return product
 
 @api_router.post("/products")
-async def create_product(product: ProductCreate, token: dict = Depends(verify_token)):
-    product_obj = Product(**product.model_dump())
+async def create_product(product: ProductCreate, background_tasks: BackgroundTasks, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    product_obj = Product(**product.model_dump(), store_id=store_id)
     await db.products.insert_one(product_obj.model_dump())
+    store_cache.invalidate(store_id, "catalog")
+    background_tasks.add_task(republish_catalog, store_id)
     return product_obj
 
 @api_router.put("/products/{product_id}")
-async def update_product(product_id: str, product: ProductCreate, token: dict = Depends(verify_token)):
+async def update_product(product_id: str, product: ProductCreate, background_tasks: BackgroundTasks, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
     doc = product.model_dump()
-    await db.products.update_one({"id": product_id}, {"$set": doc})
+    await db.products.update_one(doc_key(store_id, product_id), {"$set": doc})
+    store_cache.invalidate(store_id, "catalog")
+    background_tasks.add_task(republish_catalog, store_id)
     return {**doc, "id": product_id}
 
 @api_router.delete("/products/{product_id}")
-async def delete_product(product_id: str, token: dict = Depends(verify_token)):
-    await db.products.delete_one({"id": product_id})
+async def delete_product(product_id: str, background_tasks: BackgroundTasks, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    await db.products.delete_one(doc_key(store_id, product_id))
+    store_cache.invalidate(store_id, "catalog")
+    background_tasks.add_task(republish_catalog, store_id)
     return {"message": "Deletado"}
 
 # PEDIDOS
 @api_router.get("/orders")
-async def get_orders(token: dict = Depends(verify_token)):
-    return await db.orders.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
+async def get_orders(store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    return await db.orders.find(by_store(store_id), {"_id": 0}).sort(NEWEST_FIRST).to_list(1000)
+
+@api_router.get("/orders/{order_id}")
+async def get_order(order_id: str, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    order = await find_order(store_id, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Pedido não encontrado")
+    return order
 
 @api_router.post("/orders")
-async def create_order(order: OrderCreate):
-    order_obj = Order(**order.model_dump())
-    await db.orders.insert_one(order_obj.model_dump())
+async def create_order(order: OrderCreate, store_id: str = Depends(current_store)):
+    # A taxa de entrega é sempre recalculada aqui, nunca aceita do cliente
+    quote = await quote_delivery(store_id, order.customer_cep)
+    order_obj = Order(**{
+        **order.model_dump(),
+        "store_id": store_id,
+        "customer_phone": normalize_phone(order.customer_phone),
+        "customer_cep": quote["cep"],
+        "delivery_fee": quote["fee"],
+        "total": order.subtotal + quote["fee"],
+    })
+    doc = order_obj.model_dump()
+    # A notificação vai no próprio pedido: uma única escrita atômica, e o envio
+    # fica por conta do worker, então o checkout não espera o provedor
+    recipient = await notification_recipient(store_id)
+    if recipient is None:
+        await db.orders.insert_one(doc)
+    else:
+        notification = {**build_order_notification(doc, recipient), "store_id": store_id}
+        await db.orders.insert_one({**doc, "notification": notification})
+        outbox_worker.wake()
+    try:
+        await record_customer_order(doc)
+    except Exception:
+        # O pedido já está salvo; o resumo do cliente é derivado e não deve derrubar o checkout
+        logger.exception("Falha ao atualizar o resumo do cliente do pedido %s", doc["id"])
     return order_obj
 
 @api_router.patch("/orders/{order_id}/status")
-async def update_status(order_id: str, status: str, token: dict = Depends(verify_token)):
-    await db.orders.update_one({"id": order_id}, {"$set": {"status": status}})
+async def update_status(order_id: str, status: str, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    before = await db.orders.find_one_and_update(
+        doc_key(store_id, order_id), {"$set": {"status": status}},
+        {"_id": 0, "id": 1, "customer_phone": 1, "status": 1},
+    )
+    if before and (before.get("status") == CANCELLED_STATUS) != (status == CANCELLED_STATUS):
+        await sync_customer(store_id, before.get("customer_phone"))
     return {"status": "ok"}
 
 @api_router.delete("/orders/{order_id}")
-async def delete_order(order_id: str, token: dict = Depends(verify_token)):
-    await db.orders.delete_one({"id": order_id})
+async def delete_order(order_id: str, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    query = doc_key(store_id, order_id)
+    order = await db.orders.find_one_and_delete(query, {"_id": 0, "id": 1, "customer_phone": 1})
+    if not order:
+        order = await db.orders_archive.find_one_and_delete(query, {"_id": 0, "id": 1, "customer_phone": 1})
+    if order:
+        await sync_customer(store_id, order.get("customer_phone"))
     return {"status": "deleted"}
 
+# CLIENTES
+@api_router.get("/customers")
+async def get_customers(limit: int = 100, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    cursor = db.customers.find(by_store(store_id), {"_id": 0}).sort(RECENT_CUSTOMERS_FIRST)
+    return await cursor.to_list(min(limit, 1000))
+
+@api_router.get("/customers/{phone}")
+async def get_customer(phone: str, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    customer = await db.customers.find_one(customer_key(store_id, normalize_phone(phone)), {"_id": 0})
+    if not customer:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return customer
+
+@api_router.get("/customers/{phone}/orders")
+async def get_customer_orders(phone: str, limit: int = 50, store_id: str = Depends(current_store), token: dict = Depends(verify_token)):
+    query = customer_orders_query(store_id, normalize_phone(phone))
+    limit = min(limit, 1000)
+    orders = await db.orders.find(query, {"_id": 0}).sort(NEWEST_FIRST).to_list(limit)
+    if len(orders) < limit:
+        orders += await db.orders_archive.find(query, {"_id": 0}).sort(NEWEST_FIRST).to_list(limit - len(orders))
+    return orders
+
 app.include_router(api_router)
+app.include_router(api_router, prefix="/stores/{store_id}")
+# O diretório só é criado na subida (start_catalog_publish)
+app.mount("/catalog", StaticFiles(directory=BUNDLE_DIR, check_dir=False), name="catalog")
 
 app.add_middleware(
     CORSMiddleware,
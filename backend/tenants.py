@@ -0,0 +1,63 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+STORE_ID_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+
+
+def parse_store_hosts(raw: str) -> Dict[str, str]:
+    """Lê STORE_HOSTS no formato "bolos.com.br=renaildes,doces.com.br=outra"."""
+    hosts = {}
+    for pair in (raw or "").split(","):
+        if "=" not in pair:
+            continue
+        host, store_id = (part.strip().lower() for part in pair.split("=", 1))
+        if host and STORE_ID_RE.match(store_id):
+            hosts[host] = store_id
+    return hosts
+
+
+def host_store(host: str, hosts: Dict[str, str]) -> Optional[str]:
+    return hosts.get((host or "").split(":")[0].lower())
+
+
+class TenantCache:
+    """LRU por loja: cada loja ocupa uma única entrada com seu catálogo e configurações.
+
+    Uma loja movimentada só renova a própria entrada; as demais só saem quando
+    há mais de `max_stores` lojas ativas. Os valores expiram após `ttl` segundos
+    para que outros processos do deploy enxerguem alterações.
+    """
+
+    def __init__(self, max_stores: int = 32, ttl: float = 60.0):
+        self.max_stores = max_stores
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def get(self, store_id: str, key: str):
+        entry = self._entries.get(store_id)
+        if entry is None or key not in entry:
+            return None
+        self._entries.move_to_end(store_id)
+        value, expires_at = entry[key]
+        if expires_at < time.monotonic():
+            del entry[key]
+            return None
+        return value
+
+    def set(self, store_id: str, key: str, value):
+        entry = self._entries.setdefault(store_id, {})
+        self._entries.move_to_end(store_id)
+        entry[key] = (value, time.monotonic() + self.ttl)
+        while len(self._entries) > self.max_stores:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, store_id: str, key: Optional[str] = None):
+        if key is None:
+            self._entries.pop(store_id, None)
+        elif store_id in self._entries:
+            self._entries[store_id].pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
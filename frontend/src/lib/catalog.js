@@ -0,0 +1,46 @@
+import axios from 'axios';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+// Manifesto publicado pelo backend no host estático/CDN (ex.: https://cdn.exemplo.com/renaildes/manifest.json)
+const MANIFEST_URL = process.env.REACT_APP_CATALOG_MANIFEST_URL;
+
+let bundlePromise = null;
+
+const loadBundle = async () => {
+  const manifest = (await axios.get(MANIFEST_URL)).data;
+  const bundleUrl = new URL(manifest.file, new URL(MANIFEST_URL, window.location.href)).toString();
+  return (await axios.get(bundleUrl)).data;
+};
+
+// Carrega o bundle estático uma vez por visita; sem manifesto (ou se falhar) usa a API
+const getBundle = () => {
+  if (!MANIFEST_URL) return Promise.resolve(null);
+  if (!bundlePromise) {
+    bundlePromise = loadBundle().catch((error) => {
+      console.error('Erro ao carregar catálogo estático:', error);
+      bundlePromise = null;
+      return null;
+    });
+  }
+  return bundlePromise;
+};
+
+export const getProducts = async () => {
+  const bundle = await getBundle();
+  if (bundle) return bundle.products;
+  return (await axios.get(`${API}/products`)).data;
+};
+
+export const getProduct = async (id) => {
+  const bundle = await getBundle();
+  const product = bundle?.products.find((p) => p.id === id);
+  if (product) return product;
+  return (await axios.get(`${API}/products/${id}`)).data;
+};
+
+export const getSettings = async () => {
+  const bundle = await getBundle();
+  if (bundle) return bundle.settings;
+  return (await axios.get(`${API}/settings`)).data;
+};
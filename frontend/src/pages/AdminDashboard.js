@@ -20,6 +20,7 @@ const AdminDashboard = () => {
     delivery_fee: 5.0,
     pix_key: '',
     contact_phone: '',
+    notify_to: '',
     massas_options: [], 
     recheios_options: [] 
   });
@@ -341,6 +342,10 @@ const AdminDashboard = () => {
                     <label className="block text-sm font-bold text-gray-700 mb-1">WhatsApp de Contato</label>
                     <input type="text" className="w-full p-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-pink-500 outline-none" value={settings.contact_phone} onChange={e => setSettings({...settings, contact_phone: e.target.value})} placeholder="(00) 00000-0000" />
                   </div>
+                  <div>
+                    <label className="block text-sm font-bold text-gray-700 mb-1">WhatsApp para Avisos de Pedidos</label>
+                    <input type="text" className="w-full p-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-pink-500 outline-none" value={settings.notify_to || ''} onChange={e => setSettings({...settings, notify_to: e.target.value})} placeholder="5500000000000" />
+                  </div>
                 </div>
               </div>
               <div className="pt-4 border-t">
@@ -2,15 +2,12 @@ import { motion } from 'framer-motion';
 import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { ShoppingBag, Filter, PlayCircle } from 'lucide-react';
-import axios from 'axios';
+import { getProducts } from '../lib/catalog';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import { useCart } from '../context/CartContext';
 import { toast } from 'sonner';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
-
 const CatalogPage = () => {
   const [products, setProducts] = useState([]);
   const [filteredProducts, setFilteredProducts] = useState([]);
@@ -43,8 +40,7 @@ const CatalogPage = () => {
   const fetchProducts = async () => {
     setLoading(true);
     try {
-      const response = await axios.get(`${API}/products`);
-      setProducts(response.data);
+      setProducts(await getProducts());
     } catch (error) {
       console.error('Erro ao carregar produtos:', error);
       toast.error('Erro ao conectar com o servidor. Tente recarregar.');
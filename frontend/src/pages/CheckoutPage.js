@@ -3,6 +3,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Trash2, CreditCard, Banknote, Smartphone } from 'lucide-react';
 import axios from 'axios';
+import { getSettings } from '../lib/catalog';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import { useCart } from '../context/CartContext';
@@ -14,7 +15,10 @@ const API = `${BACKEND_URL}/api`;
 const CheckoutPage = () => {
   const navigate = useNavigate();
   const { cart, removeFromCart, updateQuantity, getTotal, clearCart } = useCart();
+  // Com zonas de entrega configuradas a taxa depende do CEP (null = ainda não calculada)
   const [deliveryFee, setDeliveryFee] = useState(5.0);
+  const [cepRequired, setCepRequired] = useState(false);
+  const [quoteError, setQuoteError] = useState('');
   const [pixKey, setPixKey] = useState('');
   const [paymentMethod, setPaymentMethod] = useState('pix');
   const [changeFor, setChangeFor] = useState('');
@@ -23,6 +27,7 @@ const CheckoutPage = () => {
     customer_name: '',
     customer_phone: '',
     customer_address: '',
+    customer_cep: '',
   });
 
   useEffect(() => {
@@ -31,14 +36,47 @@ const CheckoutPage = () => {
 
   const fetchSettings = async () => {
     try {
-      const response = await axios.get(`${API}/settings`);
-      setDeliveryFee(response.data.delivery_fee);
-      setPixKey(response.data.pix_key);
+      const settings = await getSettings();
+      const hasZones = settings.delivery_zones?.length > 0;
+      setCepRequired(hasZones);
+      setDeliveryFee(hasZones ? null : settings.delivery_fee);
+      setPixKey(settings.pix_key);
     } catch (error) {
       console.error('Erro ao carregar configurações:', error);
     }
   };
 
+  const errorDetail = (error, fallback) => {
+    const detail = error.response?.data?.detail;
+    return typeof detail === 'string' ? detail : fallback;
+  };
+
+  const fetchDeliveryQuote = async (cep) => {
+    if (cep.replace(/\D/g, '').length !== 8) {
+      if (cepRequired) setQuoteError('Informe um CEP válido para calcular a entrega.');
+      return null;
+    }
+    try {
+      const response = await axios.get(`${API}/delivery/quote`, { params: { cep } });
+      setDeliveryFee(response.data.fee);
+      setQuoteError('');
+      return response.data.fee;
+    } catch (error) {
+      const message = errorDetail(error, 'Não foi possível calcular a entrega.');
+      if (cepRequired) setDeliveryFee(null);
+      setQuoteError(message);
+      toast.error(message);
+      return null;
+    }
+  };
+
+  const handleCepChange = (value) => {
+    setFormData({ ...formData, customer_cep: value });
+    // A taxa anterior não vale mais para o CEP novo
+    if (cepRequired) setDeliveryFee(null);
+    setQuoteError('');
+  };
+
   const calculateTotal = () => {
     return cart.reduce((sum, item) => {
       const itemPrice = item.finalPrice || item.price;
@@ -59,6 +97,16 @@ const CheckoutPage = () => {
       return;
     }
 
+    if (cepRequired && formData.customer_cep.replace(/\D/g, '').length !== 8) {
+      toast.error('Informe um CEP válido para calcular a entrega.');
+      return;
+    }
+
+    // fetchDeliveryQuote já mostra o motivo quando o CEP não é atendido
+    if (cepRequired && deliveryFee === null && (await fetchDeliveryQuote(formData.customer_cep)) === null) {
+      return;
+    }
+
     const orderData = {
       ...formData,
       items: cart.map((item) => ({
@@ -69,8 +117,8 @@ const CheckoutPage = () => {
         customization: item.customization || null
       })),
       subtotal: calculateTotal(),
-      delivery_fee: deliveryFee,
-      total: calculateTotal() + deliveryFee,
+      delivery_fee: deliveryFee ?? 0,
+      total: calculateTotal() + (deliveryFee ?? 0),
       payment_method: paymentMethod,
       payment_details:
         paymentMethod === 'dinheiro' ? { change_for: changeFor } : null,
@@ -91,7 +139,7 @@ const CheckoutPage = () => {
       navigate('/');
     } catch (error) {
       console.error('Erro ao criar pedido:', error);
-      toast.error('Erro ao processar pedido. Tente novamente.');
+      toast.error(errorDetail(error, 'Erro ao processar pedido. Tente novamente.'));
     }
   };
 
@@ -117,9 +165,10 @@ const CheckoutPage = () => {
       msg += `\n`;
     });
     
-    msg += `💰 *Subtotal:* R$ ${calculateTotal().toFixed(2)}\n`;
-    msg += `🚚 *Entrega:* R$ ${deliveryFee.toFixed(2)}\n`;
-    msg += `💵 *TOTAL:* R$ ${(calculateTotal() + deliveryFee).toFixed(2)}\n\n`;
+    // Valores do pedido salvo: a taxa de entrega é a calculada pelo servidor
+    msg += `💰 *Subtotal:* R$ ${(order.total - order.delivery_fee).toFixed(2)}\n`;
+    msg += `🚚 *Entrega:* R$ ${order.delivery_fee.toFixed(2)}\n`;
+    msg += `💵 *TOTAL:* R$ ${order.total.toFixed(2)}\n\n`;
     
     msg += `💳 *Forma de Pagamento:* `;
     if (paymentMethod === 'pix') msg += 'PIX';
@@ -291,6 +340,26 @@ const CheckoutPage = () => {
                   />
                 </div>
 
+                <div>
+                  <label className="block text-brand-brown font-semibold mb-2">
+                    CEP {cepRequired && '*'}
+                  </label>
+                  <input
+                    type="text"
+                    inputMode="numeric"
+                    value={formData.customer_cep}
+                    onChange={(e) => handleCepChange(e.target.value)}
+                    onBlur={(e) => fetchDeliveryQuote(e.target.value)}
+                    className="w-full px-4 py-3 rounded-lg border border-brand-pink/50 focus:border-brand-brown focus:ring-1 focus:ring-brand-brown outline-none transition-colors"
+                    placeholder="00000-000"
+                    required={cepRequired}
+                    data-testid="customer-cep-input"
+                  />
+                  {quoteError && (
+                    <p className="text-sm text-red-500 mt-1" data-testid="delivery-quote-error">{quoteError}</p>
+                  )}
+                </div>
+
                 <div>
                   <label className="block text-brand-brown font-semibold mb-2">
                     Endereço Completo *
@@ -415,13 +484,13 @@ const CheckoutPage = () => {
                 <div className="flex justify-between text-brand-brown">
                   <span>Taxa de Entrega</span>
                   <span className="font-semibold" data-testid="delivery-fee-display">
-                    R$ {deliveryFee.toFixed(2)}
+                    {deliveryFee === null ? 'Informe o CEP' : `R$ ${deliveryFee.toFixed(2)}`}
                   </span>
                 </div>
                 <div className="border-t border-brand-pink/20 pt-4 flex justify-between text-brand-brown">
                   <span className="text-xl font-bold">Total</span>
                   <span className="text-2xl font-bold text-brand-rose" data-testid="total-display">
-                    R$ {(calculateTotal() + deliveryFee).toFixed(2)}
+                    R$ {(calculateTotal() + (deliveryFee ?? 0)).toFixed(2)}
                   </span>
                 </div>
               </div>
@@ -2,15 +2,12 @@ import { motion } from 'framer-motion';
 import { Link } from 'react-router-dom';
 import { ShoppingBag, Star, Heart, PlayCircle } from 'lucide-react';
 import { useEffect, useState } from 'react';
-import axios from 'axios';
+import { getProducts } from '../lib/catalog';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import { useCart } from '../context/CartContext';
 import { toast } from 'sonner';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
-
 const HomePage = () => {
   const [featuredProducts, setFeaturedProducts] = useState([]);
   const [videoProducts, setVideoProducts] = useState([]);
@@ -22,8 +19,7 @@ const HomePage = () => {
 
   const fetchProducts = async () => {
     try {
-      const response = await axios.get(`${API}/products`);
-      const allProducts = response.data;
+      const allProducts = await getProducts();
 
       // 1. Filtra produtos marcados como destaque (mantendo sua lógica original)
       const featured = allProducts.filter((p) => p.featured).slice(0, 3);
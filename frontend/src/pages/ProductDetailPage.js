@@ -2,15 +2,12 @@ import { motion } from 'framer-motion';
 import { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { ShoppingBag, ArrowLeft, Info, CheckCircle } from 'lucide-react';
-import axios from 'axios';
+import { getProduct, getSettings } from '../lib/catalog';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import { useCart } from '../context/CartContext';
 import { toast } from 'sonner';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
-
 const ProductDetailPage = () => {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -50,12 +47,11 @@ const ProductDetailPage = () => {
     const loadPageData = async () => {
       setLoading(true);
       try {
-        const [prodRes, settingsRes] = await Promise.all([
-          axios.get(`${API}/products/${id}`),
-          axios.get(`${API}/settings`)
+        const [prod, settings] = await Promise.all([
+          getProduct(id),
+          getSettings()
         ]);
 
-        const prod = prodRes.data;
         setProduct(prod);
         
         const category = prod.category || '';
@@ -70,9 +66,9 @@ const ProductDetailPage = () => {
         } else {
           setIsDoce(false);
           setQuantity(1);
-          if (settingsRes.data.massas_options?.length > 0) setMassasOptions(settingsRes.data.massas_options);
+          if (settings.massas_options?.length > 0) setMassasOptions(settings.massas_options);
           else setMassasOptions(defaultMassas);
-          if (settingsRes.data.recheios_options?.length > 0) setRecheiosOptions(settingsRes.data.recheios_options);
+          if (settings.recheios_options?.length > 0) setRecheiosOptions(settings.recheios_options);
           else setRecheiosOptions(defaultRecheios);
           
           // --- REGRA DE 2 SABORES ATUALIZADA ---
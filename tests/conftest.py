@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+import mongomock_motor
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from tenants import TenantCache  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Banco em memória no lugar do MongoDB, com cache de lojas limpo."""
+    database = mongomock_motor.AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "store_cache", TenantCache())
+    monkeypatch.setattr(server.outbox_worker, "collection", database.orders)
+    return database
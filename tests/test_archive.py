@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import server
+
+STORE = server.DEFAULT_STORE_ID
+
+
+def days_ago(n):
+    return (datetime.now(timezone.utc) - timedelta(days=n)).isoformat()
+
+
+def order(i, status="Feito", age=200, store_id=STORE):
+    return {"id": f"pedido-{i}", "store_id": store_id, "status": status, "created_at": days_ago(age), "total": 10.0}
+
+
+def test_archives_only_old_finished_orders_in_batches(db):
+    async def scenario():
+        await db.orders.insert_many(
+            [order(i) for i in range(5)]
+            + [order("pendente", status="Pendente"), order("recente", age=1), order("outra", store_id="outra")]
+        )
+        result = await server.archive_orders(STORE, older_than_days=90, batch_size=2)
+        assert result["archived"] == 5
+        remaining = {o["id"] for o in await db.orders.find({}).to_list(None)}
+        assert remaining == {"pedido-pendente", "pedido-recente", "pedido-outra"}
+        assert await db.orders_archive.count_documents({"store_id": STORE}) == 5
+
+    asyncio.run(scenario())
+
+
+def test_interrupted_run_can_be_repeated_without_duplicates(db):
+    async def scenario():
+        await db.orders.insert_many([order(i) for i in range(3)])
+        # Simula uma queda entre a cópia para o arquivo e a remoção de `orders`
+        await db.orders_archive.insert_one({**order(0), "archived_at": days_ago(0)})
+        result = await server.archive_orders(STORE, older_than_days=90)
+        assert result["archived"] == 3
+        assert await db.orders.count_documents({}) == 0
+        assert await db.orders_archive.count_documents({"id": "pedido-0"}) == 1
+        assert await db.orders_archive.count_documents({}) == 3
+
+    asyncio.run(scenario())
+
+
+def test_archived_orders_are_found_and_deleted_through_fallback(db):
+    async def scenario():
+        await db.orders.insert_many([order(1), order(2, status="Pendente")])
+        await server.archive_orders(STORE, older_than_days=90)
+        assert (await server.find_order(STORE, "pedido-1"))["status"] == "Feito"
+        assert (await server.find_order(STORE, "pedido-2"))["status"] == "Pendente"
+        assert await server.find_order("outra", "pedido-1") is None
+
+        await server.delete_order("pedido-1", store_id=STORE, token={})
+        assert await server.find_order(STORE, "pedido-1") is None
+        assert await db.orders_archive.count_documents({}) == 0
+
+    asyncio.run(scenario())
+
+
+def test_archive_all_stores_covers_every_store(db):
+    async def scenario():
+        await db.settings.insert_one({"id": "app_settings", "store_id": "outra"})
+        await db.orders.insert_many([order(1), order(2, store_id="outra")])
+        await server.archive_all_stores()
+        assert await db.orders.count_documents({}) == 0
+        assert await db.orders_archive.count_documents({}) == 2
+
+    asyncio.run(scenario())
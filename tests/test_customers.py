@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+STORE = server.DEFAULT_STORE_ID
+
+
+@pytest.mark.parametrize("raw", [
+    "(75) 98177-7873",
+    "75981777873",
+    "075 98177 7873",
+    "+55 75 98177-7873",
+    "55 75 98177-7873",
+    "0055 75 98177-7873",
+])
+def test_normalize_phone_accepts_brazilian_numbers_with_ddd(raw):
+    assert server.normalize_phone(raw) == "+5575981777873"
+
+
+def test_normalize_phone_accepts_landline_and_foreign_numbers():
+    assert server.normalize_phone("(75) 3221-1234") == "+557532211234"
+    assert server.normalize_phone("+1 415 555 0100") == "+14155550100"
+
+
+@pytest.mark.parametrize("raw", ["981777873", "98177-7873", "81777873", "", "123", "+12"])
+def test_normalize_phone_rejects_numbers_without_ddd(raw):
+    with pytest.raises(HTTPException) as exc:
+        server.normalize_phone(raw)
+    assert exc.value.status_code == 400
+
+
+def test_migration_normalizes_old_orders_and_rebuilds_customers(db):
+    def order(i, phone, created_at, total=100.0, status="Feito"):
+        return {
+            "id": f"pedido-{i}", "store_id": STORE, "customer_name": f"Cliente {i}",
+            "customer_phone": phone, "customer_address": "Rua A", "items": [],
+            "total": total, "created_at": created_at, "status": status,
+        }
+
+    async def scenario():
+        await db.orders.insert_many([
+            order(1, "(75) 98177-7873", "2024-01-01"),
+            order(2, "+5575981777873", "2024-03-01", total=50.0),
+            order(3, "98177-7873", "2024-02-01"),
+            order(5, "75 98177-7873", "2024-04-01", status="Cancelado"),
+        ])
+        await db.orders_archive.insert_one(order(4, "75 98177 7873", "2023-01-01", total=30.0))
+
+        await server.migrate_customers()
+        await server.migrate_customers()  # segunda execução não altera nada
+
+        customer = await db.customers.find_one({"store_id": STORE, "phone": "+5575981777873"})
+        assert customer["order_count"] == 3
+        assert customer["lifetime_value"] == 180.0
+        assert customer["first_order_at"] == "2023-01-01"
+        assert customer["last_order_id"] == "pedido-2"
+        assert await db.customers.count_documents({}) == 1
+
+        invalid = await db.orders.find_one({"id": "pedido-3"})
+        assert invalid["customer_phone"] == "98177-7873"
+        assert invalid["customer_phone_invalid"] is True
+        migrated = await db.orders.find_one({"id": "pedido-1"})
+        assert migrated["customer_phone_raw"] == "(75) 98177-7873"
+
+        history = await server.get_customer_orders("75981777873", store_id=STORE, token={})
+        assert [o["id"] for o in history] == ["pedido-5", "pedido-2", "pedido-1", "pedido-4"]
+
+    asyncio.run(scenario())
+
+
+def place_order(phone="(75) 98177-7873", subtotal=100.0):
+    payload = server.OrderCreate(
+        customer_name="Maria", customer_phone=phone, customer_address="Rua A",
+        items=[], subtotal=subtotal, delivery_fee=0.0, total=subtotal, payment_method="pix",
+    )
+    return server.create_order(payload, store_id=STORE)
+
+
+def test_delete_and_cancel_update_the_customer_summary(db):
+    async def customer():
+        return await db.customers.find_one({"store_id": STORE, "phone": "+5575981777873"}, {"_id": 0})
+
+    async def scenario():
+        first = await place_order(subtotal=100.0)
+        second = await place_order(subtotal=50.0)
+        assert (await customer())["order_count"] == 2
+
+        await server.update_status(second.id, "Cancelado", store_id=STORE, token={})
+        c = await customer()
+        assert (c["order_count"], c["lifetime_value"], c["last_order_id"]) == (1, first.total, first.id)
+
+        await server.update_status(second.id, "Em preparo", store_id=STORE, token={})
+        assert (await customer())["order_count"] == 2
+
+        await server.delete_order(second.id, store_id=STORE, token={})
+        c = await customer()
+        assert (c["order_count"], c["last_order_id"]) == (1, first.id)
+
+        await server.delete_order(first.id, store_id=STORE, token={})
+        assert await customer() is None
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_fixes_drifted_summaries(db):
+    async def scenario():
+        order = await place_order(subtotal=80.0)
+        await db.customers.update_one({"store_id": STORE}, {"$set": {"order_count": 7, "lifetime_value": 1.0}})
+        await db.customers.insert_one({"store_id": STORE, "phone": "+5511999999999", "order_count": 3})
+        await db.customers.insert_one({"store_id": "outra", "phone": "+5511999999999", "order_count": 3})
+
+        result = await server.run_customers_rebuild(store_id=STORE, token={})
+        assert result == {"customers": 1, "removed": 1}
+        customer = await db.customers.find_one({"store_id": STORE, "phone": "+5575981777873"})
+        assert (customer["order_count"], customer["lifetime_value"]) == (1, order.total)
+        assert await db.customers.count_documents({"store_id": "outra"}) == 1
+
+    asyncio.run(scenario())
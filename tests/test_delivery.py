@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+import server
+from delivery import DeliveryFeeIndex, DeliveryZone, normalize_cep
+
+
+def zone(name, start, end, fee=10.0):
+    return DeliveryZone(name=name, cep_start=start, cep_end=end, fee=fee)
+
+
+def test_lookup_finds_zone_by_range():
+    index = DeliveryFeeIndex([
+        zone("Longe", "44050", "44099", 12.0),
+        zone("Centro", "44000", "44049", 5.0),
+    ])
+    assert index.lookup("44000000").name == "Centro"
+    assert index.lookup("44049999").name == "Centro"
+    assert index.lookup("44050000").fee == 12.0
+    assert index.lookup("44099999").name == "Longe"
+    assert index.lookup("43999999") is None
+    assert index.lookup("44100000") is None
+
+
+def test_lookup_between_zones_returns_none():
+    index = DeliveryFeeIndex([zone("A", "10000", "10999"), zone("B", "30000", "30999")])
+    assert index.lookup("20000000") is None
+
+
+def test_prefixes_are_padded_to_full_ceps():
+    index = DeliveryFeeIndex([zone("Bairro", "4400", "4400")])
+    assert index.lookup("44000000").name == "Bairro"
+    assert index.lookup("44009999").name == "Bairro"
+    assert index.lookup("44010000") is None
+
+
+def test_full_ceps_with_mask_are_accepted():
+    index = DeliveryFeeIndex([zone("Rua", "44001-000", "44001-999")])
+    assert index.lookup("44001500").name == "Rua"
+
+
+def test_overlapping_zones_are_rejected():
+    with pytest.raises(ValueError, match="se sobrepõem"):
+        DeliveryFeeIndex([zone("A", "44000", "44050"), zone("B", "44050", "44099")])
+
+
+def test_inverted_range_is_rejected():
+    with pytest.raises(ValueError, match="invertida"):
+        DeliveryFeeIndex([zone("A", "44099", "44000")])
+
+
+def test_invalid_prefix_is_rejected():
+    with pytest.raises(ValueError, match="CEP inválido"):
+        DeliveryFeeIndex([zone("A", "", "44000")])
+    with pytest.raises(ValueError, match="CEP inválido"):
+        DeliveryFeeIndex([zone("A", "440000000", "44000")])
+
+
+def test_negative_fee_is_rejected():
+    with pytest.raises(ValueError):
+        zone("A", "44000", "44099", fee=-5.0)
+
+
+def test_invalid_zones_in_db_fall_back_to_flat_fee(db):
+    async def scenario():
+        await db.settings.insert_one({
+            "id": "app_settings", "store_id": server.DEFAULT_STORE_ID, "delivery_fee": 7.0,
+            "delivery_zones": [
+                {"name": "A", "cep_start": "44000", "cep_end": "44050", "fee": 5.0},
+                {"name": "B", "cep_start": "44050", "cep_end": "44099", "fee": 6.0},
+            ],
+        })
+        settings = await server.get_settings(store_id=server.DEFAULT_STORE_ID)
+        assert len(settings["delivery_zones"]) == 2
+        quote = await server.get_delivery_quote("44001-000", store_id=server.DEFAULT_STORE_ID)
+        assert quote["fee"] == 7.0
+
+    asyncio.run(scenario())
+
+
+def test_empty_index_is_falsy():
+    assert not DeliveryFeeIndex([])
+    assert DeliveryFeeIndex([zone("A", "1", "2")])
+
+
+def test_normalize_cep():
+    assert normalize_cep("44001-000") == "44001000"
+    assert normalize_cep("4400100") is None
+    assert normalize_cep(None) is None
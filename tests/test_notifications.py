@@ -0,0 +1,141 @@
+import asyncio
+
+import mongomock_motor
+
+import server
+from notifications import OutboxWorker, build_order_notification
+
+ORDER = {
+    "id": "pedido-123456789",
+    "store_id": server.DEFAULT_STORE_ID,
+    "customer_name": "Maria",
+    "customer_phone": "11999999999",
+    "customer_address": "Rua das Flores, 10",
+    "items": [{"name": "Bolo 15cm", "quantity": 1, "price": 140.0}],
+    "total": 145.0,
+    "payment_method": "pix",
+}
+
+
+class StubSender:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.sent = []
+
+    async def send(self, notification):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("provedor fora do ar")
+        self.sent.append(notification)
+
+
+def make_worker(sender, **kwargs):
+    collection = mongomock_motor.AsyncMongoMockClient()["test"]["orders"]
+    return collection, OutboxWorker(collection, sender, **kwargs)
+
+
+async def insert_order(collection, order):
+    await collection.insert_one({**order, "notification": build_order_notification(order)})
+
+
+def test_drain_sends_pending_notifications_in_batches():
+    async def scenario():
+        sender = StubSender()
+        collection, worker = make_worker(sender, batch_size=2)
+        for i in range(3):
+            await insert_order(collection, {**ORDER, "id": f"pedido-{i}"})
+        assert await worker.drain_once() == 2
+        assert await worker.drain_once() == 1
+        assert await worker.drain_once() == 0
+        assert len(sender.sent) == 3
+        assert await collection.count_documents({"notification.status": "sent"}) == 3
+
+    asyncio.run(scenario())
+
+
+def test_failed_send_is_rescheduled_with_backoff():
+    async def scenario():
+        sender = StubSender(failures=1)
+        collection, worker = make_worker(sender, base_delay=30)
+        await insert_order(collection, ORDER)
+        assert await worker.drain_once() == 1
+        doc = (await collection.find_one({}))["notification"]
+        assert doc["status"] == "pending"
+        assert doc["attempts"] == 1
+        assert doc["last_error"] == "provedor fora do ar"
+        # Ainda não venceu o backoff: nada a enviar
+        assert await worker.drain_once() == 0
+        assert sender.sent == []
+
+    asyncio.run(scenario())
+
+
+def test_gives_up_after_max_attempts():
+    async def scenario():
+        sender = StubSender(failures=10)
+        collection, worker = make_worker(sender, max_attempts=2, base_delay=0)
+        await insert_order(collection, ORDER)
+        await worker.drain_once()
+        await worker.drain_once()
+        doc = (await collection.find_one({}))["notification"]
+        assert doc["status"] == "failed"
+        assert doc["attempts"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_backoff_is_exponential_and_capped():
+    _, worker = make_worker(StubSender(), base_delay=5, max_delay=60)
+    assert [worker.backoff(n) for n in range(1, 6)] == [5, 10, 20, 40, 60]
+
+
+def test_updates_are_scoped_to_the_store():
+    async def scenario():
+        sender = StubSender()
+        collection, worker = make_worker(sender)
+        # Mesmo id em outra loja: só o pedido reservado pode ser marcado como enviado
+        await collection.insert_one({**ORDER, "store_id": "outra"})
+        await insert_order(collection, ORDER)
+        assert await worker.drain_once() == 1
+        other = await collection.find_one({"store_id": "outra"})
+        assert "notification" not in other
+        mine = await collection.find_one({"store_id": ORDER["store_id"]})
+        assert mine["notification"]["status"] == "sent"
+
+    asyncio.run(scenario())
+
+
+def test_orders_without_notification_are_ignored():
+    async def scenario():
+        sender = StubSender()
+        collection, worker = make_worker(sender)
+        await collection.insert_one({**ORDER})
+        assert await worker.drain_once() == 0
+
+    asyncio.run(scenario())
+
+
+def test_create_order_writes_notification_inside_the_order(db, monkeypatch):
+    monkeypatch.setenv("NOTIFY_TO", "5575000000000")
+
+    async def scenario():
+        payload = server.OrderCreate(**{**ORDER, "subtotal": 140.0, "delivery_fee": 5.0})
+        order = await server.create_order(payload, store_id=server.DEFAULT_STORE_ID)
+        saved = await db.orders.find_one({"id": order.id})
+        assert saved["notification"]["status"] == "pending"
+        assert saved["notification"]["order_id"] == order.id
+        assert await db.orders.count_documents({}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_create_order_without_recipient_queues_nothing(db, monkeypatch):
+    monkeypatch.delenv("NOTIFY_TO", raising=False)
+
+    async def scenario():
+        payload = server.OrderCreate(**{**ORDER, "subtotal": 140.0, "delivery_fee": 5.0})
+        order = await server.create_order(payload, store_id=server.DEFAULT_STORE_ID)
+        saved = await db.orders.find_one({"id": order.id})
+        assert "notification" not in saved
+
+    asyncio.run(scenario())
@@ -0,0 +1,72 @@
+import asyncio
+import os
+
+import pytest
+
+import publish
+import server
+
+STORE = server.DEFAULT_STORE_ID
+
+
+@pytest.fixture(autouse=True)
+def bundle_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "BUNDLE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_republishes_when_bundle_file_is_missing(db, tmp_path):
+    async def scenario():
+        await db.products.insert_one({"id": "p1", "store_id": STORE, "name": "Bolo", "price": 10.0})
+        first = await server.get_catalog_bundle(STORE)
+        bundle = tmp_path / first["path"]
+        assert bundle.exists()
+
+        # Deploy novo: o disco volta vazio, mas o ponteiro continua no banco e no cache
+        bundle.unlink()
+        (tmp_path / STORE / "manifest.json").unlink()
+        again = await server.get_catalog_bundle(STORE)
+        assert again["version"] == first["version"]
+        assert bundle.exists()
+        assert (tmp_path / STORE / "manifest.json").exists()
+
+    asyncio.run(scenario())
+
+
+def test_prunes_old_versions_but_keeps_current(db, tmp_path):
+    async def scenario():
+        versions = []
+        for i in range(publish.KEEP_VERSIONS + 3):
+            await db.products.update_one(
+                {"id": "p1", "store_id": STORE}, {"$set": {"price": float(i)}}, upsert=True
+            )
+            pointer = await publish.publish_catalog(db, STORE, tmp_path)
+            os.utime(tmp_path / pointer["path"], (i, i))
+            versions.append(pointer["file"])
+
+        kept = sorted(p.name for p in (tmp_path / STORE).glob("catalog.*.json"))
+        assert kept == sorted(versions[-publish.KEEP_VERSIONS:])
+
+        # Voltar a um conteúdo antigo reaproveita o arquivo e o protege da limpeza
+        await db.products.update_one({"id": "p1", "store_id": STORE}, {"$set": {"price": 0.0}})
+        pointer = await publish.publish_catalog(db, STORE, tmp_path)
+        assert pointer["file"] == versions[0]
+        assert (tmp_path / pointer["path"]).exists()
+        assert len(list((tmp_path / STORE).glob("catalog.*.json"))) == publish.KEEP_VERSIONS
+
+    asyncio.run(scenario())
+
+
+def test_startup_creates_bundle_dir_and_republishes(db, monkeypatch, tmp_path):
+    target = tmp_path / "deploy-novo"
+    monkeypatch.setattr(server, "BUNDLE_DIR", target)
+    monkeypatch.setattr(server, "catalog_task", None)
+
+    async def scenario():
+        await server.start_catalog_publish()
+        assert target.is_dir()
+        await server.catalog_task
+        assert (target / STORE / "manifest.json").exists()
+        await server.stop_catalog_publish()
+
+    asyncio.run(scenario())
@@ -0,0 +1,250 @@
+"""Garante que as consultas do server.py usam índice com volume de produção.
+
+Precisa de um MongoDB real (explain() não existe em mocks): usa MONGO_TEST_URL,
+ou MONGO_URL, ou localhost. Sem servidor disponível, os testes são pulados,
+exceto com REQUIRE_MONGO=1 (como no CI), quando falham.
+"""
+import asyncio
+import os
+import random
+import uuid
+from datetime import datetime, timezone, timedelta
+
+import pymongo
+import pytest
+
+import server
+
+N_PRODUCTS = 20_000
+N_ORDERS = 50_000
+PHONE = "+5575981777873"
+STORES = ["renaildes", "outra", "terceira"]
+STORE = STORES[0]
+
+
+@pytest.fixture(scope="module")
+def db():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    url = os.environ.get("MONGO_TEST_URL") or os.environ.get("MONGO_URL") or "mongodb://localhost:27017"
+    client = pymongo.MongoClient(url, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except pymongo.errors.PyMongoError:
+        if os.environ.get("REQUIRE_MONGO") == "1":
+            pytest.fail(f"MongoDB indisponível em {url}")
+        pytest.skip(f"MongoDB indisponível em {url}")
+
+    name = f"query_plans_{uuid.uuid4().hex[:8]}"
+    database = client[name]
+    server.db = AsyncIOMotorClient(url)[name]
+    asyncio.run(server.create_indexes())
+
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def ts():
+        return (start + timedelta(minutes=rng.randrange(3_000_000))).isoformat()
+
+    database.settings.insert_many([{**server.Settings().model_dump(), "store_id": s} for s in STORES])
+    database.products.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "store_id": STORES[i % len(STORES)],
+            "name": f"Bolo {i}",
+            "price": 100.0,
+            "category": "Bolos",
+            "created_at": ts(),
+        }
+        for i in range(N_PRODUCTS)
+    ])
+    statuses = ["Pendente", "Em preparo", "Feito", "Cancelado"]
+    database.orders.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "store_id": STORES[i % len(STORES)],
+            "customer_name": "Cliente",
+            "customer_phone": PHONE if i % 100 == 0 else f"+55759{i:08d}",
+            "status": rng.choice(statuses),
+            "total": 120.0,
+            "created_at": ts(),
+            "notification": {
+                "status": rng.choice(["pending", "sent", "sent", "sent", "failed"]),
+                "next_attempt_at": ts(),
+            },
+        }
+        for i in range(N_ORDERS)
+    ])
+    database.customers.insert_many([
+        {
+            "store_id": STORES[i % len(STORES)],
+            "phone": PHONE if i == 0 else f"+55759{i:08d}",
+            "order_count": 1,
+            "last_order_at": ts(),
+        }
+        for i in range(N_ORDERS // 5)
+    ])
+
+    database.orders_archive.insert_many([
+        {**order, "id": str(uuid.uuid4()), "archived_at": ts()}
+        for order in database.orders.find({}, {"_id": 0}).limit(N_ORDERS // 5)
+    ])
+    database.catalog_bundles.insert_many([{"store_id": s, "version": "x"} for s in STORES])
+    database.users.insert_many([
+        {"store_id": s, "username": "admin", "hashed_password": "x", "provisioned_at": ts()} for s in STORES
+    ])
+
+    yield database
+
+    client.drop_database(name)
+    client.close()
+
+
+def plan_stages(plan):
+    """Todos os estágios do plano vencedor, percorrendo estágios aninhados."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+def assert_indexed(explain):
+    stages = set(plan_stages(explain["queryPlanner"]["winningPlan"]))
+    assert "COLLSCAN" not in stages, f"varredura completa da coleção: {stages}"
+    assert "SORT" not in stages, f"ordenação em memória: {stages}"
+
+
+def explain_write(db, command, collection, query, **op):
+    key = "updates" if command == "update" else "deletes"
+    return db.command("explain", {command: collection, key: [{"q": query, **op}]}, verbosity="queryPlanner")
+
+
+def explain_find_and_modify(db, collection, query, **op):
+    return db.command("explain", {"findAndModify": collection, "query": query, **op}, verbosity="queryPlanner")
+
+
+def any_id(db, collection):
+    return db[collection].find_one({"store_id": STORE}, {"id": 1})["id"]
+
+
+# Produtos
+def test_get_products(db):
+    assert_indexed(db.products.find(server.by_store(STORE), {"_id": 0}).sort(server.OLDEST_FIRST).explain())
+
+
+def test_get_product(db):
+    assert_indexed(db.products.find(server.doc_key(STORE, any_id(db, "products")), {"_id": 0}).limit(1).explain())
+
+
+def test_update_and_delete_product(db):
+    query = server.doc_key(STORE, any_id(db, "products"))
+    assert_indexed(explain_write(db, "update", "products", query, u={"$set": {"price": 1.0}}))
+    assert_indexed(explain_write(db, "delete", "products", query, limit=1))
+
+
+# Pedidos
+def test_get_orders(db):
+    assert_indexed(db.orders.find(server.by_store(STORE), {"_id": 0}).sort(server.NEWEST_FIRST).explain())
+
+
+@pytest.mark.parametrize("collection", ["orders", "orders_archive"])
+def test_find_order(db, collection):
+    query = server.doc_key(STORE, any_id(db, collection))
+    assert_indexed(db[collection].find(query, {"_id": 0}).limit(1).explain())
+
+
+def test_update_status(db):
+    query = server.doc_key(STORE, any_id(db, "orders"))
+    assert_indexed(explain_find_and_modify(db, "orders", query, update={"$set": {"status": "Feito"}}))
+
+
+@pytest.mark.parametrize("collection", ["orders", "orders_archive"])
+def test_delete_order(db, collection):
+    query = server.doc_key(STORE, any_id(db, collection))
+    assert_indexed(explain_find_and_modify(db, collection, query, remove=True))
+
+
+# Configurações e catálogo
+def test_get_and_update_settings(db):
+    query = server.doc_key(STORE, "app_settings")
+    assert_indexed(db.settings.find(query, {"_id": 0}).limit(1).explain())
+    assert_indexed(explain_write(db, "update", "settings", query, u={"$set": {"pix_key": "x"}}, upsert=True))
+
+
+def test_get_catalog_bundle(db):
+    assert_indexed(db.catalog_bundles.find(server.by_store(STORE), {"_id": 0}).limit(1).explain())
+
+
+# Arquivamento
+def test_archive_orders(db):
+    query = server.archivable_query(STORE, "2022-01-01")
+    assert_indexed(db.orders.find(query, {"_id": 0}).sort(server.OLDEST_FIRST).limit(server.ARCHIVE_BATCH_SIZE).explain())
+
+
+def test_archive_writes(db):
+    order_id = any_id(db, "orders")
+    assert_indexed(explain_write(db, "update", "orders_archive", server.doc_key(STORE, order_id), u={"id": order_id}, upsert=True))
+    assert_indexed(explain_write(db, "delete", "orders", server.doc_key(STORE, {"$in": [order_id]}), limit=0))
+
+
+# Clientes
+def test_get_customers(db):
+    query = server.by_store(STORE)
+    assert_indexed(db.customers.find(query, {"_id": 0}).sort(server.RECENT_CUSTOMERS_FIRST).limit(100).explain())
+
+
+def test_get_customer(db):
+    assert_indexed(db.customers.find(server.customer_key(STORE, PHONE), {"_id": 0}).limit(1).explain())
+
+
+@pytest.mark.parametrize("collection", ["orders", "orders_archive"])
+def test_get_customer_orders(db, collection):
+    query = server.customer_orders_query(STORE, PHONE)
+    assert_indexed(db[collection].find(query, {"_id": 0}).sort(server.NEWEST_FIRST).explain())
+
+
+def test_record_customer_order(db):
+    update = {"$inc": {"order_count": 1}}
+    assert_indexed(explain_write(db, "update", "customers", server.customer_key(STORE, PHONE), u=update, upsert=True))
+
+
+@pytest.mark.parametrize("collection", ["orders", "orders_archive"])
+@pytest.mark.parametrize("phone", [PHONE, {"$regex": "^\\+"}], ids=["refresh", "rebuild"])
+def test_customer_summary_orders(db, collection, phone):
+    query = server.summary_orders_query(STORE, phone)
+    assert_indexed(db[collection].find(query, server.CUSTOMER_ORDER_FIELDS).explain())
+
+
+def test_customer_summary_writes(db):
+    key = server.customer_key(STORE, PHONE)
+    assert_indexed(explain_write(db, "update", "customers", key, u={"phone": PHONE}, upsert=True))
+    assert_indexed(explain_write(db, "delete", "customers", key, limit=1))
+    assert_indexed(explain_write(db, "delete", "customers", server.customer_key(STORE, {"$nin": [PHONE]}), limit=0))
+
+
+# Notificações
+def test_outbox_drain(db):
+    worker = server.outbox_worker
+    field = worker.field
+    query = worker.due_query()
+    assert_indexed(
+        db.orders.find(query, {"_id": 0, "id": 1, field: 1}).sort(f"{field}.next_attempt_at", 1).limit(worker.batch_size).explain()
+    )
+
+
+def test_outbox_claim_and_deliver(db):
+    worker = server.outbox_worker
+    field = worker.field
+    doc = db.orders.find_one({"store_id": STORE, f"{field}.status": "pending"}, {"_id": 0, "store_id": 1, "id": 1, field: 1})
+    assert_indexed(explain_write(db, "update", "orders", worker.claim_query(doc), u=worker._set({"next_attempt_at": "x"})))
+    assert_indexed(explain_write(db, "update", "orders", worker.doc_query(doc), u=worker._set({"status": "sent"})))
+
+
+# Login
+def test_admin_login(db):
+    query = server.admin_user_query(STORE, "admin")
+    assert_indexed(db.users.find(query, {"_id": 0, "hashed_password": 1}).limit(1).explain())
@@ -0,0 +1,83 @@
+import asyncio
+
+import server
+from tenants import TenantCache, host_store, parse_store_hosts
+
+
+def test_busy_store_does_not_evict_other_stores():
+    cache = TenantCache(max_stores=2)
+    cache.set("a", "catalog", ["bolo"])
+    cache.set("b", "catalog", ["torta"])
+    for _ in range(100):
+        cache.set("a", "catalog", ["bolo"])
+        cache.set("a", "settings", {"pix_key": "x"})
+    assert cache.get("b", "catalog") == ["torta"]
+    assert len(cache) == 2
+
+
+def test_least_recently_used_store_is_evicted():
+    cache = TenantCache(max_stores=2)
+    cache.set("a", "catalog", [1])
+    cache.set("b", "catalog", [2])
+    cache.get("a", "catalog")
+    cache.set("c", "catalog", [3])
+    assert cache.get("b", "catalog") is None
+    assert cache.get("a", "catalog") == [1]
+
+
+def test_entries_expire_and_can_be_invalidated():
+    cache = TenantCache(ttl=-1)
+    cache.set("a", "catalog", [1])
+    assert cache.get("a", "catalog") is None
+
+    cache = TenantCache()
+    cache.set("a", "catalog", [1])
+    cache.set("a", "settings", {})
+    cache.invalidate("a", "catalog")
+    assert cache.get("a", "catalog") is None
+    assert cache.get("a", "settings") == {}
+
+
+def test_store_hosts():
+    hosts = parse_store_hosts("Bolos.com.br=renaildes, doces.com=outra,invalido,x.com=Nome Ruim")
+    assert hosts == {"bolos.com.br": "renaildes", "doces.com": "outra"}
+    assert host_store("bolos.com.br:443", hosts) == "renaildes"
+    assert host_store("desconhecido.com", hosts) is None
+
+
+def test_admin_credentials_are_per_store(db, monkeypatch):
+    monkeypatch.setenv("ADMIN_USERNAME", "admin")
+    monkeypatch.setenv("ADMIN_PASSWORD", "senha-global")
+
+    async def scenario():
+        default = server.DEFAULT_STORE_ID
+        await db.users.insert_many([
+            {
+                "store_id": "outra", "username": "dona", "hashed_password": server.pwd_context.hash("senha-outra"),
+                "provisioned_at": "2026-01-01T00:00:00+00:00",
+            },
+            # Linha antiga (sem provisioned_at) com a senha padrão de force_admin.py
+            {"store_id": default, "username": "admin", "hashed_password": server.pwd_context.hash("admin123")},
+        ])
+        assert await server.check_admin_password(default, "admin", "senha-global")
+        assert not await server.check_admin_password("outra", "admin", "senha-global")
+        assert await server.check_admin_password("outra", "dona", "senha-outra")
+        assert not await server.check_admin_password("outra", "dona", "errada")
+        assert not await server.check_admin_password(default, "dona", "senha-outra")
+        assert not await server.check_admin_password(default, "admin", "admin123")
+
+    asyncio.run(scenario())
+
+
+def test_notification_recipient_is_per_store(db, monkeypatch):
+    monkeypatch.setenv("NOTIFY_TO", "5575000000000")
+
+    async def scenario():
+        await db.settings.insert_one({"id": "app_settings", "store_id": "outra", "notify_to": "5511999999999"})
+        assert await server.notification_recipient("outra") == "5511999999999"
+        assert await server.notification_recipient(server.DEFAULT_STORE_ID) == "5575000000000"
+        assert await server.notification_recipient("terceira") is None
+        monkeypatch.delenv("NOTIFY_TO")
+        assert await server.notification_recipient(server.DEFAULT_STORE_ID) is None
+
+    asyncio.run(scenario())